@@ -2,11 +2,10 @@ from __future__ import annotations
 
 import sys
 import logging
-import traceback
-from copy import deepcopy
-from logging import DEBUG, INFO, WARNING, ERROR
+from collections import deque
+from logging import DEBUG, WARNING, ERROR, getLevelName
 
-from PyQt5.QtCore import QObject, QMutex, QThread, pyqtSlot
+from PyQt5.QtCore import QObject, QThread, QTimer, Qt, pyqtSlot
 from PyQt5.QtWidgets import QApplication
 
 from services import Master
@@ -14,34 +13,42 @@ from static_vars import (
     logging_handler,
     ChannelConfig,
     Settings)
-from ui.view import MainWindow, Status
+from ui.view import MainWindow
 from ui.dynamic_style import STYLE
 from main_utils import ServiceController
 
 
-# Threads management attributes
-THREADS_LOCK = QMutex()
-
 # Local logging config
 logger = logging.getLogger()
 logger.setLevel(DEBUG)
 logger.addHandler(logging_handler)
-DEBUG_LEVELS = {DEBUG: 'DEBUG', INFO: 'INFO',
-                WARNING: 'WARNING', ERROR: 'ERROR'}
+
+# Interval of printing collected log messages to the UI
+LOG_FLUSH_INTERVAL_MS = 50
+# Extra time for services to finish after the processes termination timeout
+SERVICES_STOP_MARGIN_MS = 10_000
 
 
 class Controller(QObject):
     def __init__(self):
         super(Controller, self).__init__()
 
+        # Log messages are printed to the UI in batches
+        self._log_queue: deque[tuple[str, int]] = deque()
+        self._log_timer = QTimer(self)
+        self._log_timer.setSingleShot(True)
+        self._log_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+        self._log_timer.timeout.connect(self._flush_log_messages)
+
         # Initiate UI and services, update views settings
         suc_loaded, self.settings = Settings.load()
 
         self.Window = MainWindow(self.settings)
-        self.Master = Master(THREADS_LOCK)
+        self.Master = Master()
 
         self._srv_thread: QThread | None = None
         self._srv_controller: ServiceController | None = None
+        self._services_stopped = True
 
         # Connecting signals
         self._connect_ui_signals()
@@ -58,44 +65,63 @@ class Controller(QObject):
         self.Window.show()
 
     def _connect_ui_signals(self):
+        # All the UI signals are emitted from the GUI thread,
+        # so the slots are called directly.
+        direct = Qt.DirectConnection
+
         # Settings
-        self.Window.saveSettings.connect(self._save_settings)
+        self.Window.saveSettings.connect(self._save_settings, direct)
 
         # Channel management
-        self.Window.checkExistsChannel[str].connect(self.highlight_on_exists)
-        self.Window.addChannel[str].connect(self.add_channel)
-        self.Window.delChannel[str].connect(self.del_channel)
+        self.Window.checkExistsChannel[str].connect(
+            self.highlight_on_exists, direct)
+        self.Window.addChannel[str].connect(self.add_channel, direct)
+        self.Window.delChannel[str].connect(self.del_channel, direct)
         self.Window.openChannelSettings[str].connect(
-            self.open_channel_settings)
+            self.open_channel_settings, direct)
         self.Window.applyChannelSettings[tuple].connect(
-            self.apply_channel_settings)
+            self.apply_channel_settings, direct)
 
         # Service management
-        self.Window.runServices[str, str].connect(self.run_services)
-        self.Window.stopServices.connect(self.set_stop_services)
+        self.Window.runServices[str, str].connect(self.run_services, direct)
+        self.Window.stopServices.connect(self.set_stop_services, direct)
 
         # Process
-        self.Window.stopProcess[int].connect(self.stop_single_process)
+        self.Window.stopProcess[int].connect(
+            self.stop_single_process, direct)
 
     def _connect_service_signals(self):
+        # All the service signals are emitted from the Master and Slave
+        # threads, so the slots are always queued to the GUI thread.
+        queued = Qt.QueuedConnection
+
         # New message signals
-        self.Master.log[int, str].connect(self.add_log_message)
+        self.Master.log[int, str].connect(self.add_log_message, queued)
+        self.Master.Slave.log[int, str].connect(self.add_log_message, queued)
         self.Master.Slave.procLog[int, str].connect(
-            self.Window.log_tabs.proc_log)
+            self.Window.log_tabs.proc_log, queued)
 
         # Stream status signals
-        self.Master.works[bool].connect(self.Window.update_master_enabled)
-        self.Master.Slave.works[bool].connect(self.Window.update_slave_enabled)
-        self.Master.Slave.streamRec[str, int, str].connect(self._stream_rec)
-        self.Master.Slave.streamFinished[int].connect(self._stream_finished)
-        self.Master.Slave.streamFailed[int].connect(self._stream_fail)
+        self.Master.works[bool].connect(
+            self.Window.update_master_enabled, queued)
+        self.Master.Slave.works[bool].connect(
+            self.Window.update_slave_enabled, queued)
+        self.Master.Slave.streamRec[str, int, str].connect(
+            self._stream_rec, queued)
+        self.Master.Slave.streamFinished[int].connect(
+            self._stream_finished, queued)
+        self.Master.Slave.streamFailed[int].connect(
+            self._stream_fail, queued)
 
         # Channel status signals
-        self.Master.channelOff[str].connect(self._channel_off)
-        self.Master.channelLive[str].connect(self._channel_live)
+        self.Master.channelOff[str].connect(
+            self.Window.widget_channels_tree.set_channel_off, queued)
+        self.Master.channelLive[str].connect(
+            self.Window.widget_channels_tree.set_channel_live, queued)
 
         # Next scan timer signal
-        self.Master.nextScanTimer[int].connect(self.Window.update_scan_timer)
+        self.Master.nextScanTimer[int].connect(
+            self.Window.update_scan_timer, queued)
 
     @pyqtSlot(dict)
     def _save_settings(self, settings: Settings = None):
@@ -117,10 +143,10 @@ class Controller(QObject):
         self._update_views_settings()
 
     def _update_threads_settings(self):
-        THREADS_LOCK.lock()
+        # Services take the settings values by reference assignments,
+        # their threads never see a half-updated value
         self.Master.update_values(self.settings)
         self.Master.Slave.update_values(self.settings)
-        THREADS_LOCK.unlock()
         self.add_log_message(DEBUG, "Service settings updated.")
 
     def _update_views_settings(self):
@@ -162,43 +188,62 @@ class Controller(QObject):
             self.Master.set_start_force_scan()
             return
 
+        self._services_stopped = False
         self.Master.start()
 
     @pyqtSlot()
-    def set_stop_services(self):
-        THREADS_LOCK.lock()
-        self.Master.soft_stop()
-        self.Master.Slave.soft_stop()
-        THREADS_LOCK.unlock()
+    def set_stop_services(self, blocking: bool = False):
+        """
+        Stop Master and Slave
+
+        :param blocking: Wait for the services threads to finish
+        """
+        if not self._services_stopped:
+            self.Master.soft_stop()
+            self.Master.Slave.soft_stop()
+            self._services_stopped = True
+
+        if blocking:
+            # Slave may wait for each recording to finish
+            timeout = (self.settings.proc_term_timeout_sec * 1000
+                       + SERVICES_STOP_MARGIN_MS)
+            self.Master.wait(timeout)
+            self.Master.Slave.wait(timeout)
 
     @pyqtSlot(int)
     def stop_single_process(self, pid: int):
-        THREADS_LOCK.lock()
-        self.Master.Slave.pids_to_stop.append(pid)
-        THREADS_LOCK.unlock()
+        # Adding to a set is atomic, no lock required
+        self.Master.Slave.pids_to_stop.add(pid)
+        self.Master.Slave.wake_up()
 
     @pyqtSlot(int, str)
     def add_log_message(self, level: int, text: str):
-        logger.log(level, text)
-        message = f"[{DEBUG_LEVELS[level]}] {text}"
-        self.Window.log_tabs.add_common_message(message, level)
+        if logger.isEnabledFor(level):
+            logger.log(level, text)
+        message = f"[{getLevelName(level)}] {text}"
+        self._log_queue.append((message, level))
+        if not self._log_timer.isActive():
+            self._log_timer.start()
+
+    @pyqtSlot()
+    def _flush_log_messages(self):
+        messages = list(self._log_queue)
+        self._log_queue.clear()
+        self.Window.log_tabs.add_common_messages(messages)
 
     @pyqtSlot(str)
     def add_channel(self, channel_name: str):
         """ Add a channel to the monitored list """
         if not channel_name or channel_name in self.settings.channels:
             return
+        # Channel names are the keys of all the services lookups
+        channel_name = sys.intern(channel_name)
         channel_data = ChannelConfig()
         self.settings.channels[channel_name] = channel_data
 
-        # Saving settings
+        # Saving settings, Master gets the new channel with them
         self._save_settings()
 
-        # Update Master
-        THREADS_LOCK.lock()
-        self.Master.channels[channel_name] = deepcopy(channel_data)
-        THREADS_LOCK.unlock()
-
         # Update UI
         self.Window.widget_channels_tree.add_channel_item(
             channel_name, channel_data.alias)
@@ -209,10 +254,10 @@ class Controller(QObject):
         """ Delete selected channel from the monitored list """
         if channel_name not in self.settings.channels:
             return
-        THREADS_LOCK.lock()
-        active_channels = self.Master.Slave.get_names_of_active_channels()
-        THREADS_LOCK.unlock()
-        if channel_name in active_channels:
+        # Master keeps the channels that are being recorded. The check is
+        # made under Slave's channels lock, so queued streams of a removed
+        # channel are not recorded.
+        if not self.Master.try_remove_channel(channel_name):
             self.add_log_message(
                 WARNING,
                 f"Cannot delete channel \"{channel_name}\": "
@@ -221,13 +266,8 @@ class Controller(QObject):
         del self.settings.channels[channel_name]
         self._save_settings()
 
-        # Update Master channel dict
-        THREADS_LOCK.lock()
-        self.Master.remove_channel(channel_name)
-        THREADS_LOCK.unlock()
-
         # Update UI
-        self.Window.widget_channels_tree.del_channel_item()
+        self.Window.widget_channels_tree.del_channel_item(channel_name)
 
     @pyqtSlot(str)
     def highlight_on_exists(self, ch_name: str):
@@ -249,23 +289,12 @@ class Controller(QObject):
     @pyqtSlot(tuple)
     def apply_channel_settings(self, channel_settings: tuple[str, str, str]):
         ch_name, alias, svq = channel_settings
-        self.settings.channels[ch_name].alias = alias
-        self.settings.channels[ch_name].svq = svq
+        # Channel configs are immutable, Master gets the new one on save
+        self.settings.channels[ch_name] = ChannelConfig(alias=alias, svq=svq)
         self._save_settings()
         channel_row_text = alias if alias else ch_name
-        self.Window.widget_channels_tree.set_channel_alias(channel_row_text)
-
-    @pyqtSlot(str)
-    def _channel_off(self, ch_name: str):
-        ch_index = list(self.settings.channels.keys()).index(ch_name)
-        self.Window.widget_channels_tree.set_channel_status(
-            ch_index, Status.Channel.OFF)
-
-    @pyqtSlot(str)
-    def _channel_live(self, ch_name: str):
-        ch_index = list(self.settings.channels.keys()).index(ch_name)
-        self.Window.widget_channels_tree.set_channel_status(
-            ch_index, Status.Channel.LIVE)
+        self.Window.widget_channels_tree.set_channel_alias(
+            ch_name, channel_row_text)
 
     @pyqtSlot(str, int, str)
     def _stream_rec(self, ch_name: str, pid: int, stream_name: str):
@@ -285,6 +314,12 @@ class Controller(QObject):
 
 
 if __name__ == '__main__':
+    import traceback
+    from PyQt5 import sip
+
+    # Skip the destructors walk on exit, the process is finishing anyway
+    sip.setdestroyonexit(False)
+
     controller = None
     try:
         app = QApplication(sys.argv)
@@ -295,4 +330,6 @@ if __name__ == '__main__':
         logger.critical(e_, exc_info=True)
     finally:
         if controller is not None:
-            controller.set_stop_services()
+            controller.set_stop_services(blocking=True)
+            # Handle events posted by the finished threads
+            QApplication.processEvents()
@@ -1,40 +1,71 @@
 import logging
-from pathlib import Path
-from subprocess import run, DEVNULL
+import os
+from functools import lru_cache, wraps
+from shutil import which
+from subprocess import run, DEVNULL, TimeoutExpired
+from time import monotonic
 
 from PyQt5.QtCore import QObject, pyqtSignal
 
-from static_vars import StopThreads, logging_handler, FAKE_AGENTS
+from static_vars import StopThreads, logging_handler, get_fake_agents
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 logger.addHandler(logging_handler)
 
+# Lifetime of the cached results of the executables checks
+CALLABLE_CHECK_TTL_SEC = 30
+# A hanging executable is not callable
+CALLABLE_CHECK_TIMEOUT_SEC = 10
 
+
+@lru_cache(maxsize=None)
 def get_useragent(browser: str):
-    return FAKE_AGENTS.getBrowser(browser)['useragent']
+    """ User agent of the browser, the same during the session """
+    return get_fake_agents().getBrowser(browser)['useragent']
 
 
 def logger_handler(func):
+    @wraps(func)
     def _wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
+        except StopThreads:
+            raise
         except Exception as e:
-            if not isinstance(e, StopThreads):
-                logger.exception(
-                    "Function {func_name} got exception: {err}".format(
-                        func_name=func.__name__, err=e),
-                    stack_info=True)
-            raise e
+            logger.exception("Function %s got exception: %s",
+                             func.__name__, e, stack_info=True)
+            raise
     return _wrapper
 
 
-def is_callable(path: str):
+def is_callable(path: str) -> bool:
+    """ Check the command runs, the result is cached for a while """
+    # Looking up the executable is enough to reject a command
+    # without spawning it, but e.g. 'python -m yt_dlp' still has to run
+    executable = path.split(maxsplit=1)[:1]
+    if not executable:
+        return False
+    executable = which(executable[0])
+    if executable is None:
+        return False
+    try:
+        # A replaced executable is checked again at once
+        mtime = os.path.getmtime(executable)
+    except OSError:
+        return False
+    return _is_callable(
+        path, mtime, int(monotonic() // CALLABLE_CHECK_TTL_SEC))
+
+
+@lru_cache(maxsize=16)
+def _is_callable(path: str, _mtime: float, _ttl_hash: int) -> bool:
     cmd = path.split()
     cmd.append('--help')
     try:
-        return run(cmd, stdout=DEVNULL, stderr=DEVNULL).returncode == 0
-    except (FileNotFoundError, PermissionError):
+        return run(cmd, stdout=DEVNULL, stderr=DEVNULL,
+                   timeout=CALLABLE_CHECK_TIMEOUT_SEC).returncode == 0
+    except (FileNotFoundError, PermissionError, TimeoutExpired):
         return False
     except Exception as e:
         logger.exception(e)
@@ -42,22 +73,17 @@ def is_callable(path: str):
 
 
 def check_exists_and_callable(_path: str) -> bool:
-    if Path(_path).exists() and Path(_path).is_file() and is_callable(_path):
-        return True
-    return False
+    return os.path.isfile(_path) and is_callable(_path)
 
 
 def check_dir_exists(_path: str) -> bool:
-    if Path(_path).exists() and Path(_path).is_dir():
-        return True
-    return False
+    return os.path.isdir(_path)
 
 
-def get_channel_dir(channel_name: str, records_dir: str) -> Path:
+def get_channel_dir(channel_name: str, records_dir: str) -> str:
     """ Create channel's dir is not exist and return its path """
-    channel_dir = Path(records_dir).joinpath(channel_name)
-    if not channel_dir.exists():
-        channel_dir.mkdir(parents=True, exist_ok=True)
+    channel_dir = os.path.join(records_dir, channel_name)
+    os.makedirs(channel_dir, exist_ok=True)
     return channel_dir
 
 
@@ -73,12 +99,15 @@ class ServiceController(QObject):
         super(ServiceController, self).__init__()
 
     def run(self):
+        # 'finished' quits the thread and deletes the controller,
+        # so it must be emitted exactly once
+        errors = []
         if self.ytdlp_command is not None \
                 and not is_callable(self.ytdlp_command):
-            self.finished[bool, str].emit(False, "yt-dlp not found!")
+            errors.append("yt-dlp not found!")
 
         if self.ffmpeg_path is not None \
                 and not check_exists_and_callable(self.ffmpeg_path):
-            self.finished[bool, str].emit(False, "ffmpeg not found!")
+            errors.append("ffmpeg not found!")
 
-        self.finished[bool, str].emit(True, "")
+        self.finished[bool, str].emit(not errors, " ".join(errors))
@@ -1,22 +1,24 @@
 from __future__ import annotations
 
 import logging
+import re
 import subprocess
-import tempfile
-from copy import deepcopy
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from logging import INFO, WARNING, ERROR
-from queue import Queue
+from queue import Empty, Queue, SimpleQueue
 from signal import SIGINT
-from time import sleep
-from typing import IO, Dict
+from time import monotonic, time
+from typing import Dict
 
+import requests
 import yt_dlp
-from PyQt5.QtCore import pyqtSignal, QMutex
+from PyQt5.QtCore import QThread, pyqtSignal
 
 from main_utils import get_channel_dir, logger_handler, get_useragent
-from static_vars import (SoftStoppableThread, ChannelConfig, StopThreads,
-                         FLAG_LIVE, RecordProcess, logging_handler,
+from static_vars import (ChannelConfig, StopThreads, FLAG_LIVE,
+                         RecordProcess, logging_handler,
                          CHANNEL_URL_LIVE_TEMPLATE, SettingsContainer)
 
 # Local logging config
@@ -24,15 +26,118 @@ logger = logging.getLogger()
 logger.setLevel(logging.DEBUG)
 logger.addHandler(logging_handler)
 
+# Pause between Slave's checks of the queue and running processes
+SLAVE_TICK_SEC = 0.5
+# Maximum number of process output lines sent in a single signal
+PROC_LOG_BATCH = 100
+# Time to wait for the output of a finished process
+PROC_OUTPUT_CLOSE_TIMEOUT_SEC = 1
+# Number of channels checked at the same time
+SCAN_THREADS = 8
+# Number of yt-dlp extractions at the same time, not to be throttled
+YTDL_EXTRACTIONS = 4
+# Period of checking for stop while waiting for channel checks
+SCAN_WAIT_SEC = 1
+# Scan interval is divided by it while any channel is live
+LIVE_SCAN_INTERVAL_DIVIDER = 4
+LIVE_SCAN_INTERVAL_MIN_SEC = 15
+YTDL_OPTIONS = {'quiet': True, 'default_search': 'ytsearch'}
+LIVE_PAGE_TIMEOUT_SEC = 10
+# Any YouTube page contains it, consent and error pages do not
+LIVE_PAGE_DATA_MARKER = b'ytInitialData'
+LIVE_PAGE_LIVE_MARKER = b'"isLiveNow":true'
+LIVE_PAGE_UPCOMING_MARKER = b'"isUpcoming":true'
+# The live page of a live or upcoming stream is the page of its video
+LIVE_PAGE_VIDEO_URL = re.compile(
+    rb'<link rel="canonical" href="'
+    rb'(https://www\.youtube\.com/watch\?v=[\w-]{11})"')
+# Time left to a scheduled stream in the yt-dlp error message
+SCHEDULED_STREAM_DELAY = re.compile(
+    re.escape(FLAG_LIVE) + r'(?:(?P<count>\d+) (?P<unit>second|minute|hour'
+    r'|day|week)s?)?.*$', re.MULTILINE)
+SCHEDULED_STREAM_UNITS_SEC = {
+    'second': 1, 'minute': 60, 'hour': 60 * 60,
+    'day': 24 * 60 * 60, 'week': 7 * 24 * 60 * 60,
+}
+
+# Recording arguments independent of settings and streams
+YTDLP_STATIC_ARGS = (
+    # Downloading from the beginning
+    '--live-from-start',
+    # Merge all downloaded parts into two
+    # tracks (video and audio) during download
+    '--no-part',
+    # Update sockets when failed
+    '--socket-timeout', '10',
+    '--retries', '10',
+    '--retry-sleep', '5',
+    # No progress bar
+    '--no-progress',
+    # Merge into one mp4 or mkv file
+    '--merge-output-format', 'mp4/mkv',
+    # Reducing the chance of file corruption
+    # if download is interrupted
+    '--hls-use-mpegts',
+)
+
 
 @dataclass
 class StreamConfig:
+    __slots__ = ('channel_name', 'stream_quality', 'url', 'title')
+
     channel_name: str
     stream_quality: tuple
     url: str
     title: str
 
 
+class SoftStoppableThread(QThread):
+    """
+    Has:
+     1. Event 'stop' for management
+     2. Function 'raise_on_stop' to raise StopThreads
+     3. Function '_wait_or_stop' to pause until timeout, wake up or stop
+    """
+    def __init__(self):
+        # Polled by the services loops, Event reads need no lock
+        self.__stop = threading.Event()
+        self.__wake_up = threading.Event()
+        super().__init__()
+
+    def run(self) -> None:
+        self.__stop.clear()
+        self.__wake_up.clear()
+
+    def soft_stop(self):
+        """
+        Set 'stop' and interrupt the pause
+        """
+        self.__stop.set()
+        self.__wake_up.set()
+
+    def wake_up(self):
+        """
+        Interrupt the current or the next pause
+        """
+        self.__wake_up.set()
+
+    def _wait_or_stop(self, timeout: float):
+        """
+        Pause for 'timeout' seconds or until woken up,
+        then raise StopThreads if 'stop' is set
+        """
+        if self.__wake_up.wait(timeout):
+            self.__wake_up.clear()
+        self._raise_on_stop()
+
+    def _raise_on_stop(self):
+        """
+        Raise StopThreads if 'stop' is set
+        """
+        if self.__stop.is_set():
+            raise StopThreads
+
+
 class Master(SoftStoppableThread, SettingsContainer):
     log = pyqtSignal(int, str)
     channelOff = pyqtSignal(str)
@@ -40,7 +145,7 @@ class Master(SoftStoppableThread, SettingsContainer):
     nextScanTimer = pyqtSignal(int)
     works = pyqtSignal(bool)
 
-    def __init__(self, threads_lock: QMutex):
+    def __init__(self):
         """
         Service Master:
          - run service Slave
@@ -48,34 +153,64 @@ class Master(SoftStoppableThread, SettingsContainer):
          - edit Slave's queue
         """
         super(Master, self).__init__()
-        self.MUTEX = threads_lock
 
         self.__start_force_scan = False
         self.__last_status: Dict[str, bool] = {}
-        self.__scheduled_streams: Dict[str, bool] = {}
+        # Earliest start time of the scheduled streams of the channels
+        self.__scheduled_streams: Dict[str, float] = {}
         self.Slave = Slave()
-        self.Slave.log[int, str].connect(self._log)
+
+        # Channels are checked in parallel, network I/O is the bottleneck
+        self._scan_pool = ThreadPoolExecutor(max_workers=SCAN_THREADS,
+                                             thread_name_prefix='scan')
+        # HTTP sessions of the scan threads
+        self._scan_local = threading.local()
+        # Idle YoutubeDL instances, reused by the channel checks
+        self._idle_ydls: SimpleQueue[yt_dlp.YoutubeDL] = SimpleQueue()
+        self._ydl_semaphore = threading.Semaphore(YTDL_EXTRACTIONS)
 
         # Settings values
         self.channels: Dict[str, ChannelConfig] | None = None
+        # Live page URLs of the channels
+        self._live_urls: Dict[str, str] = {}
         self.scanner_sleep_min: int | None = None
 
-    def _log(self, level: int, text: str):
-        self.log[int, str].emit(level, text)
+    def _log(self, level: int, text: str, *args):
+        """ Send a message, formatted with args only if it has receivers """
+        if self.receivers(self.log) == 0:
+            return
+        self.log[int, str].emit(level, text % args if args else text)
 
     def update_values(self, settings: 'Settings'):
         # There is no need to make settings deep copy.
-        # All transferring data values are immutable.
-        # TODO: add check for settings data is immutable.
-        self.channels = deepcopy(settings.channels)
+        # All transferring data values are immutable (ChannelConfig is
+        # frozen), the dict is copied to keep its own set of channels.
+        self.channels = dict(settings.channels)
+        self._live_urls = {name: CHANNEL_URL_LIVE_TEMPLATE.format(name)
+                           for name in self.channels}
         self.scanner_sleep_min = settings.scanner_sleep_min
 
-    def remove_channel(self, channel_name: str):
-        if channel_name in self.channels:
-            del self.channels[channel_name]
+    def try_remove_channel(self, channel_name: str) -> bool:
+        """
+        Remove channel if there are no active downloads from it
+
+        :param channel_name: Channel name
+        :return: Is channel removed
+        """
+        # Slave doesn't start a recording of the channel after the check,
+        # even if its stream is queued already
+        with self.Slave.channels_lock:
+            if channel_name in self.Slave.get_names_of_active_channels():
+                return False
+            self.Slave.channels = self.Slave.channels - {channel_name}
+        # The channels themselves are updated with the saved settings
+        self.__last_status.pop(channel_name, None)
+        self.__scheduled_streams.pop(channel_name, None)
+        return True
 
     def set_start_force_scan(self):
         self.__start_force_scan = True
+        self.wake_up()
 
     def run(self) -> None:
         super(Master, self).run()
@@ -85,30 +220,138 @@ class Master(SoftStoppableThread, SettingsContainer):
 
         try:
             while True:
-                for channel_name in list(self.channels.keys()):
-                    self._check_for_stream(channel_name)
-                    self._raise_on_stop()
+                self.scan_channels()
                 self.__start_force_scan = False
                 self._raise_on_stop()
 
                 self.wait_and_check()
         except StopThreads:
             pass
+        finally:
+            self._close_ydls()
         self._log(INFO, "Scanning channels stopped.")
         self.works.emit(False)
 
+    def scan_channels(self):
+        """ Check all channels in the thread pool and wait for results """
+        # Exceptions are logged by 'logger_handler' and stay in futures
+        # The channels dict is never changed in place
+        pending = {self._scan_pool.submit(self._check_for_stream, ch_name)
+                   for ch_name in self.channels}
+        while pending:
+            _, pending = wait(pending, timeout=SCAN_WAIT_SEC)
+            try:
+                self._raise_on_stop()
+            except StopThreads:
+                # Drop the checks that are not started yet
+                # and let the running ones return their YoutubeDL
+                for future in pending:
+                    future.cancel()
+                wait(pending)
+                raise
+
+    def _acquire_ydl(self) -> yt_dlp.YoutubeDL:
+        """
+        Take an idle YoutubeDL instance or create a new one.
+        Creating YoutubeDL is expensive, so instances are reused.
+        """
+        try:
+            return self._idle_ydls.get_nowait()
+        except Empty:
+            return yt_dlp.YoutubeDL(YTDL_OPTIONS)
+
+    def _release_ydl(self, ydl: yt_dlp.YoutubeDL):
+        self._idle_ydls.put(ydl)
+
+    def _http_session(self) -> requests.Session:
+        """ Keep-alive HTTP session of the current scan thread """
+        session = getattr(self._scan_local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers['User-Agent'] = get_useragent('chrome')
+            # Skip the cookies consent page
+            session.cookies.set('SOCS', 'CAI', domain='.youtube.com')
+            self._scan_local.session = session
+        return session
+
+    def _live_video_url(self, channel_name: str, url: str) -> str | None:
+        """
+        Cheap check of the channel's live page before running yt-dlp
+
+        :param channel_name: Channel name
+        :param url: Channel's live page URL
+        :return: URL for yt-dlp, None if the channel is surely offline
+        """
+        try:
+            response = self._http_session().get(
+                url, timeout=LIVE_PAGE_TIMEOUT_SEC)
+        except requests.RequestException:
+            # Let yt-dlp to retry and report the error
+            return url
+        page = response.content
+        if response.status_code != 200 or LIVE_PAGE_DATA_MARKER not in page:
+            return url
+        if LIVE_PAGE_LIVE_MARKER not in page:
+            # Upcoming stream is checked by yt-dlp only when it's due
+            if (LIVE_PAGE_UPCOMING_MARKER not in page
+                    or self.__scheduled_streams.get(channel_name, 0) > time()):
+                return None
+        # The video page spares yt-dlp resolving the live page again
+        match = LIVE_PAGE_VIDEO_URL.search(page)
+        return match.group(1).decode() if match else url
+
+    def _close_ydls(self):
+        while not self._idle_ydls.empty():
+            self._idle_ydls.get_nowait().close()
+
     def wait_and_check(self):
         """ Waiting with a check to stop """
         # Convert minutes to seconds
         c = self.scanner_sleep_min * 60
-        while c != 0 and not self.__start_force_scan:
-            self.nextScanTimer[int].emit(c)
-            sleep(1)
-            self._raise_on_stop()
-            c -= 1
+        # Rescan live channels sooner to restart a failed recording.
+        # Deleted channels' statuses may be set back by their last scans.
+        if any(self.__last_status.get(name) for name in self.channels):
+            c = max(LIVE_SCAN_INTERVAL_MIN_SEC,
+                    c // LIVE_SCAN_INTERVAL_DIVIDER)
+        # The GUI counts the seconds down itself
         self.nextScanTimer[int].emit(c)
+        deadline = monotonic() + c
+        while not self.__start_force_scan:
+            time_left = deadline - monotonic()
+            if time_left <= 0:
+                break
+            self._wait_or_stop(time_left)
+        self.nextScanTimer[int].emit(0)
+
+    def _set_scheduled_stream(self, channel_name: str, match: re.Match):
+        """ Save the earliest start time of the channel's stream """
+        if channel_name not in self.__scheduled_streams:
+            self._log(WARNING, "%s stream in %s.", channel_name,
+                      match.group(0)[len(FLAG_LIVE):].rstrip('.'))
+        delay = 0
+        if match.group('count'):
+            # The time left is rounded, so it may be a unit less
+            delay = ((int(match.group('count')) - 1)
+                     * SCHEDULED_STREAM_UNITS_SEC[match.group('unit')])
+        self.__scheduled_streams[channel_name] = time() + delay
+
+    def _channel_off(self, channel_name: str):
+        """ Set the channel offline, the GUI gets status changes only """
+        # The channel may be deleted during its check
+        if channel_name not in self.channels:
+            return
+        was_live = self.__last_status.get(channel_name)
+        if was_live is False:
+            return
+        if was_live:
+            self._log(INFO, "Channel %s is offline.", channel_name)
+        self.__last_status[channel_name] = False
+        self.channelOff[str].emit(channel_name)
 
     def channel_status_changed(self, channel_name: str, status: bool):
+        # The channel may be deleted during its check
+        if channel_name not in self.channels:
+            return False
         if (channel_name in self.__last_status
                 and self.__last_status[channel_name] == status):
             return False
@@ -117,63 +360,66 @@ class Master(SoftStoppableThread, SettingsContainer):
 
     @logger_handler
     def _check_for_stream(self, channel_name: str):
-        url = CHANNEL_URL_LIVE_TEMPLATE.format(channel_name)
-        ytdl_options = {'quiet': True, 'default_search': 'ytsearch'}
+        live_url = self._live_urls.get(channel_name)
+        if live_url is None:
+            # The channel is deleted during the scan
+            return
+        url = self._live_video_url(channel_name, live_url)
+        # Full yt-dlp extraction only for live and upcoming streams
+        if url is None:
+            self._channel_off(channel_name)
+            return
 
-        with yt_dlp.YoutubeDL(ytdl_options) as ydl:
-            try:
-                info_dict: dict = ydl.extract_info(
-                    url, download=False,
-                    extra_info={'quiet': True, 'verbose': False})
-            except yt_dlp.utils.UserNotLive:
-                self.channelOff[str].emit(channel_name)
-                return
-            except yt_dlp.utils.DownloadError as e:
-                # Check for live flag and last status
-                if (
-                        FLAG_LIVE in str(e)
-                        and self.__scheduled_streams.get(
-                            channel_name, False) is False
-                ):
-                    warn = str(e)
-                    leftover = warn[warn.find(FLAG_LIVE) + len(FLAG_LIVE):]
-                    self._log(WARNING,
-                              f"{channel_name} stream in {leftover}.")
-                    self.__scheduled_streams[channel_name] = True
-                self.channelOff[str].emit(channel_name)
-                return
-            except Exception as e:
-                logger.exception(e)
-                self._log(ERROR, f"<yt-dlp>: {str(e)}")
-                self.channelOff[str].emit(channel_name)
-                return
+        try:
+            # At most YTDL_EXTRACTIONS instances exist, all used or idle
+            with self._ydl_semaphore:
+                ydl = self._acquire_ydl()
+                try:
+                    info_dict: dict = ydl.extract_info(url, download=False)
+                finally:
+                    self._release_ydl(ydl)
+        except yt_dlp.utils.UserNotLive:
+            self._channel_off(channel_name)
+            return
+        except yt_dlp.utils.DownloadError as e:
+            # Check for live flag and last status
+            match = SCHEDULED_STREAM_DELAY.search(str(e))
+            if match:
+                self._set_scheduled_stream(channel_name, match)
+            self._channel_off(channel_name)
+            return
+        except Exception as e:
+            logger.exception(e)
+            self._log(ERROR, "<yt-dlp>: %s", e)
+            self._channel_off(channel_name)
+            return
 
         # Check channel stream is on
         if info_dict.get("is_live"):
+            channel_config = self.channels.get(channel_name)
+            if channel_config is None:
+                # The channel is deleted during the check
+                return
+            self.__scheduled_streams.pop(channel_name, None)
             if self.channel_status_changed(channel_name, True):
-                self._log(INFO, f"Channel {channel_name} is online.")
+                self._log(INFO, "Channel %s is online.", channel_name)
                 self.channelLive[str].emit(channel_name)
 
-            # Check if Slave is ready
-            self.MUTEX.lock()
-            running_downloads = [p.channel
-                                 for p in self.Slave.running_downloads]
-            self.MUTEX.unlock()
-
-            # TODO: make sending data more thread-safe
-            if channel_name not in running_downloads:
+            # Skips the channels being recorded only. The channel may be
+            # deleted after the check, Slave checks it again under its lock.
+            if channel_name not in self.Slave.get_names_of_active_channels():
                 stream_data: StreamConfig = StreamConfig(
                     channel_name=channel_name,
-                    stream_quality=self.channels[channel_name].svq_real(),
+                    stream_quality=channel_config.svq_real,
                     url=info_dict['webpage_url'],
                     title=info_dict['title'],
                 )
                 self.Slave.queue.put(stream_data, block=True)
-                self._log(INFO, f"Recording {channel_name} added to queue.")
+                self.Slave.wake_up()
+                self._log(INFO, "Recording %s added to queue.", channel_name)
 
-        elif self.channel_status_changed(channel_name, False):
-            self._log(INFO, f"Channel {channel_name} is offline.")
-            self.channelOff[str].emit(channel_name)
+        else:
+            self._channel_off(channel_name)
 
 
 class Slave(SoftStoppableThread, SettingsContainer):
@@ -191,11 +437,17 @@ class Slave(SoftStoppableThread, SettingsContainer):
         """
         super().__init__()
 
-        self.__temp_logs: Dict[int, IO] = {}
-        self.__last_log_byte: Dict[int, int] = {}
         self.queue: Queue[StreamConfig] = Queue(-1)
-        self.running_downloads: list[RecordProcess] = []
-        self.pids_to_stop: list[int] = []
+        self.running_downloads: Dict[int, RecordProcess] = {}
+        # Names of channels of running downloads, for fast lookup.
+        # Replaced on change, so other threads may read it without locks.
+        self.active_channels: frozenset[str] = frozenset()
+        self.pids_to_stop: set[int] = set()
+        # Names of the tracked channels, recordings of others are not started
+        self.channels: frozenset[str] = frozenset()
+        # Held by the channel removal and by the start of a recording,
+        # so a channel with a recording is never removed
+        self.channels_lock = threading.Lock()
 
         # Settings values
         self.records_path: str | None = None
@@ -205,9 +457,13 @@ class Slave(SoftStoppableThread, SettingsContainer):
         self.proc_term_timeout_sec: int | None = None
         self.cookies_from_browser: str | None = None
         self.fake_useragent: bool | None = None
+        self._base_cmd: list[str] = []
 
-    def _log(self, level: int, text: str):
-        self.log[int, str].emit(level, text)
+    def _log(self, level: int, text: str, *args):
+        """ Send a message, formatted with args only if it has receivers """
+        if self.receivers(self.log) == 0:
+            return
+        self.log[int, str].emit(level, text % args if args else text)
 
     def run(self):
         super(Slave, self).run()
@@ -218,17 +474,16 @@ class Slave(SoftStoppableThread, SettingsContainer):
             while True:
                 self.check_running_downloads()
                 self._raise_on_stop()
-                while self.ready_to_download() and not self.queue.empty():
-                    stream_data = self.queue.get()
-                    self.record_stream(stream_data)
+                self.start_queued_downloads()
                 self.check_pids_to_stop()
-                self._raise_on_stop()
+                self._wait_or_stop(SLAVE_TICK_SEC)
         except StopThreads:
             self.stop_downloads()
         self._log(INFO, "Recorder stopped.")
         self.works.emit(False)
 
     def update_values(self, settings: 'Settings'):
+        self.channels = frozenset(settings.channels)
         self.records_path = settings.records_dir
         self.path_to_ffmpeg = settings.ffmpeg
         self.ytdlp_command = settings.ytdlp
@@ -236,33 +491,59 @@ class Slave(SoftStoppableThread, SettingsContainer):
         self.proc_term_timeout_sec = settings.proc_term_timeout_sec
         self.cookies_from_browser = settings.cookies_from_browser
         self.fake_useragent = settings.fake_useragent
+        self._base_cmd = self._build_base_cmd()
 
-    def get_names_of_active_channels(self):
-        return [proc.channel for proc in self.running_downloads]
+    def _build_base_cmd(self) -> list[str]:
+        """ Recording command without stream specific arguments """
+        cmd = [*self.ytdlp_command.split(),
+               '--ffmpeg-location', self.path_to_ffmpeg,
+               *YTDLP_STATIC_ARGS]
+        if self.cookies_from_browser:
+            useragent = get_useragent(self.cookies_from_browser)
+            cmd += ['--cookies-from-browser', self.cookies_from_browser,
+                    '--user-agent', f'"{useragent}"']
+        return cmd
+
+    def get_names_of_active_channels(self) -> frozenset[str]:
+        return self.active_channels
 
     def check_running_downloads(self):
 
-        list_running = []
+        finished = False
 
-        for proc in self.running_downloads:
+        for pid, proc in list(self.running_downloads.items()):
             ret_code = proc.poll()
 
             # Pass if process is not finished yet
             if ret_code is None:
                 self.handle_process_output(proc)
-                list_running.append(proc)
                 continue
             # Handling finished process
             if ret_code == 0:
                 self.streamFinished[int].emit(proc.pid)
-                self._log(INFO, f"Recording {proc.channel} finished.")
+                self._log(INFO, "Recording %s finished.", proc.channel)
             else:
                 self.streamFailed[int].emit(proc.pid)
-                self._log(ERROR, f"Recording {proc.channel}"
-                                 f" stopped with an error code: {ret_code}!")
+                self._log(ERROR,
+                          "Recording %s stopped with an error code: %s!",
+                          proc.channel, ret_code)
             self.handle_process_finished(proc)
+            del self.running_downloads[pid]
+            finished = True
 
-        self.running_downloads = list_running
+        # A channel may have more than one recording
+        if finished:
+            self.active_channels = frozenset(
+                proc.channel for proc in self.running_downloads.values())
+
+    def start_queued_downloads(self):
+        """ Start recordings from the queue while there are free slots """
+        while self.ready_to_download():
+            try:
+                stream_data = self.queue.get_nowait()
+            except Empty:
+                return
+            self.record_stream(stream_data)
 
     def ready_to_download(self) -> bool:
         # Unlimited downloads if 'max_downloads' set to 0
@@ -281,47 +562,29 @@ class Slave(SoftStoppableThread, SettingsContainer):
         records_quality: tuple = stream_data.stream_quality
         stream_title: str = stream_data.title
 
-        channel_dir = str(get_channel_dir(channel_name, self.records_path))
-        file_name = '%(title)s.%(ext)s'
-
-        temp_log = tempfile.TemporaryFile(mode='w+b')
-
-        self._log(INFO, f"Recording {channel_name} started.")
-
-        cmd = self.ytdlp_command.split() + [
-            stream_url,
-            '-P', channel_dir,
-            '-o', file_name,
-            '--ffmpeg-location', self.path_to_ffmpeg,
-            # Downloading from the beginning
-            '--live-from-start',
-            # Merge all downloaded parts into two
-            # tracks (video and audio) during download
-            '--no-part',
-            # Update sockets when failed
-            '--socket-timeout', '10',
-            '--retries', '10',
-            '--retry-sleep', '5',
-            # No progress bar
-            '--no-progress',
-            # Record quality
-            *records_quality,
-            # Merge into one mp4 or mkv file
-            '--merge-output-format', 'mp4/mkv',
-            # Reducing the chance of file corruption
-            # if download is interrupted
-            '--hls-use-mpegts',
-        ]
-        if self.cookies_from_browser:
-            useragent = get_useragent(self.cookies_from_browser)
-            cmd += ['--cookies-from-browser', self.cookies_from_browser,
-                    '--user-agent', f'"{useragent}"']
+        with self.channels_lock:
+            # The channel may be deleted after its stream was queued
+            if channel_name not in self.channels:
+                self._log(INFO, "Recording %s skipped: "
+                                "the channel is deleted.", channel_name)
+                return
+
+            channel_dir = get_channel_dir(channel_name, self.records_path)
+            file_name = '%(title)s.%(ext)s'
 
-        proc = RecordProcess(cmd, stdout=temp_log, stderr=temp_log,
-                             channel=channel_name)
-        self.__last_log_byte[proc.pid] = 0
-        self.__temp_logs[proc.pid] = temp_log
-        self.running_downloads.append(proc)
+            self._log(INFO, "Recording %s started.", channel_name)
+
+            cmd = self._base_cmd + [
+                stream_url,
+                '-P', channel_dir,
+                '-o', file_name,
+                # Record quality
+                *records_quality,
+            ]
+
+            proc = RecordProcess(cmd, channel=channel_name)
+            self.running_downloads[proc.pid] = proc
+            self.active_channels = self.active_channels | {channel_name}
 
         self.streamRec[str, int, str].emit(
             channel_name, proc.pid, stream_title)
@@ -329,13 +592,15 @@ class Slave(SoftStoppableThread, SettingsContainer):
     def check_pids_to_stop(self):
         if not self.pids_to_stop:
             return
-        for proc in self.running_downloads:
-            if proc.pid in self.pids_to_stop:
-                self.pids_to_stop.remove(proc.pid)
+        # The set is filled from the GUI thread, take a copy to iterate
+        for pid in self.pids_to_stop.copy():
+            self.pids_to_stop.discard(pid)
+            proc = self.running_downloads.get(pid)
+            if proc is not None:
                 self.send_process_stop(proc)
 
     def send_process_stop(self, proc: RecordProcess):
-        self._log(INFO, f"Stopping process {proc.pid}...")
+        self._log(INFO, "Stopping process %s...", proc.pid)
         try:
             # Fixme:
             #  ValueError raises when Windows couldn't indentify SIGINT
@@ -350,39 +615,50 @@ class Slave(SoftStoppableThread, SettingsContainer):
             return
         self._log(INFO, "Stopping records.")
 
-        for proc in self.running_downloads:
+        for proc in self.running_downloads.values():
             self.send_process_stop(proc)
 
-        for proc in self.running_downloads:
+        for proc in self.running_downloads.values():
             try:
                 ret = proc.wait(self.proc_term_timeout_sec)
                 if ret == 0:
                     self.streamFinished[int].emit(proc.pid)
                 else:
                     self.streamFailed[int].emit(proc.pid)
-                    self._log(ERROR, f"Recording {proc.channel} stopped"
-                                     f" with an error code: {ret}!")
+                    self._log(ERROR,
+                              "Recording %s stopped with an error code: %s!",
+                              proc.channel, ret)
             except subprocess.TimeoutExpired:
                 proc.kill()
                 self.streamFailed[int].emit(proc.pid)
-                self._log(ERROR, "Recording[{}] of channel {} has been"
-                                 " killed!".format(proc.pid, proc.channel))
+                self._log(ERROR,
+                          "Recording[%s] of channel %s has been killed!",
+                          proc.pid, proc.channel)
             finally:
                 self.handle_process_finished(proc)
-        self.running_downloads = []
+        self.running_downloads = {}
+        self.active_channels = frozenset()
 
     def handle_process_output(self, proc: RecordProcess):
-        last_byte = self.__last_log_byte[proc.pid]
-        self.__temp_logs[proc.pid].seek(last_byte)
-        line = self.__temp_logs[proc.pid].readline()
-        if line == b'':
-            return
-        self.__last_log_byte[proc.pid] = last_byte + len(line)
-        self.procLog[int, str].emit(proc.pid,
-                                    line.decode('utf-8', errors='ignore'))
+        """ Send all new lines of the process output in batches """
+        batch = []
+        while True:
+            try:
+                line = proc.output.get_nowait()
+            except Empty:
+                break
+            batch.append(line.rstrip())
+            if len(batch) == PROC_LOG_BATCH:
+                self._emit_proc_log(proc.pid, batch)
+                batch = []
+        if batch:
+            self._emit_proc_log(proc.pid, batch)
+
+    def _emit_proc_log(self, pid: int, lines: list[bytes]):
+        # Decode the whole batch at once, broken bytes must not stop us
+        text = b'\n'.join(lines).decode('utf-8', errors='replace')
+        self.procLog[int, str].emit(pid, text)
 
     def handle_process_finished(self, proc: RecordProcess):
+        proc.wait_output_closed(PROC_OUTPUT_CLOSE_TIMEOUT_SEC)
         self.handle_process_output(proc)
-        self.__temp_logs[proc.pid].close()
-        del self.__temp_logs[proc.pid]
-        del self.__last_log_byte[proc.pid]
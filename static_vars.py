@@ -1,23 +1,29 @@
-import json
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import sys
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from subprocess import Popen
+from queue import SimpleQueue
+from subprocess import PIPE, STDOUT, Popen
+from threading import Thread
+from typing import Union
 
-from PyQt5.QtCore import QThread
-from fake_useragent import UserAgent
-from pydantic import Field
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 
 
 # --- Common values definition ---
 
-PROJECT_PATH = Path().resolve()
-LOG_FILE = PROJECT_PATH.joinpath('ossk.log')
-SETTINGS_FILE = PROJECT_PATH.joinpath('config.json')
-STYLESHEET_PATH = PROJECT_PATH.joinpath('ui').joinpath('stylesheet.qss')
-
-FAKE_AGENTS = UserAgent(min_version=130.0, platforms='desktop')
+# Absolute working directory with the symlinks resolved
+PROJECT_PATH = Path.cwd().resolve()
+LOG_FILE = PROJECT_PATH / 'ossk.log'
+SETTINGS_FILE = PROJECT_PATH / 'config.json'
+SETTINGS_TMP_FILE = PROJECT_PATH / 'config.json.tmp'
+STYLESHEET_PATH = PROJECT_PATH / 'ui' / 'stylesheet.qss'
+DEFAULT_RECORDS_DIR = str(PROJECT_PATH / 'records')
 
 UNKNOWN = '<UNKNOWN>'
 EMPTY_ITEM = ''
@@ -25,11 +31,59 @@ CHANNEL_URL_TEMPLATE = 'https://www.youtube.com/@{}'
 CHANNEL_URL_LIVE_TEMPLATE = f'{CHANNEL_URL_TEMPLATE}/live'
 FLAG_LIVE = 'live event will begin in '
 
-logging_handler = RotatingFileHandler(
+# Number of log records written between the log file size checks
+LOG_ROLLOVER_CHECK_RECORDS = 1024
+
+
+class _RotatingFileHandler(RotatingFileHandler):
+    """ Checks the file size once per LOG_ROLLOVER_CHECK_RECORDS records """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._records_to_check = 0
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        # The file may exceed maxBytes by a few records, it's acceptable
+        if self._records_to_check:
+            self._records_to_check -= 1
+            return False
+        self._records_to_check = LOG_ROLLOVER_CHECK_RECORDS - 1
+        return bool(super().shouldRollover(record))
+
+
+class _LogFormatter(logging.Formatter):
+    """ Formats the time once per second, records come in bursts """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._last_sec = None
+        self._last_asctime = ''
+
+    def formatTime(self, record: logging.LogRecord, datefmt=None) -> str:
+        sec = int(record.created)
+        if sec != self._last_sec:
+            self._last_asctime = super().formatTime(record, datefmt)
+            self._last_sec = sec
+        return self._last_asctime
+
+
+_file_handler = _RotatingFileHandler(
     LOG_FILE, maxBytes=1024*1024*5, encoding='utf-8')
+_file_handler.setLevel(logging.DEBUG)
+_file_handler.setFormatter(_LogFormatter(
+    '{asctime} [{levelname}] {message}', "%Y-%m-%d %H:%M:%S", style='{'))
+
+# Records are written to the file by a separate thread,
+# so logging doesn't block the GUI and services threads on disk I/O
+_log_records: SimpleQueue[logging.LogRecord] = SimpleQueue()
+# Threads and processes are not logged, skip collecting them per record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logging_handler = QueueHandler(_log_records)
 logging_handler.setLevel(logging.DEBUG)
-logging_handler.setFormatter(logging.Formatter(
-    '%(asctime)s [%(levelname)s] %(message)s', "%Y-%m-%d %H:%M:%S"))
+_log_listener = QueueListener(
+    _log_records, _file_handler, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 
 # --- Local values ---
@@ -37,6 +91,9 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 logger.addHandler(logging_handler)
 
+# Last known content of the settings file and its modification time
+_settings_file_cache: Union[tuple[bytes, float], None] = None
+
 AVAILABLE_STREAM_RECORD_QUALITIES = {
     'Maximum': ('-f', 'bv*+ba/b'),
     # Download the best video available with the largest resolution
@@ -50,32 +107,51 @@ AVAILABLE_STREAM_RECORD_QUALITIES = {
     '320p': ('-S', 'res:320'),
     '240p': ('-S', 'res:240'),
 }
+# Quality names in the order they are listed in the UI
+AVAILABLE_STREAM_RECORD_QUALITIES_KEYS = tuple(
+    AVAILABLE_STREAM_RECORD_QUALITIES)
+# Quality of the new channels
+DEFAULT_STREAM_RECORD_QUALITY = 'Maximum'
 
 
-# --- Defining classes ---
+@lru_cache(maxsize=None)
+def get_fake_agents():
+    """ User agents data, it's imported and parsed on the first use """
+    from fake_useragent import UserAgent
+    return UserAgent(min_version=130.0, platforms='desktop')
 
-class SettingsLoader(json.JSONDecoder):
-    def __init__(self, *args, **kwargs):
-        json.JSONDecoder.__init__(
-            self, object_hook=self.object_hook, *args, **kwargs)
-    @staticmethod
-    def object_hook(dct: dict):
-        if 'channels' in dct:
-            for name in dct['channels'].keys():
-                dct['channels'][name] = ChannelConfig(**dct['channels'][name])
-        return dct
 
+# --- Defining classes ---
 
 class SettingsContainer:
+    __slots__ = ()
 
     def update_values(self, setting: 'Settings'):
         raise NotImplementedError
 
 
+@dataclass(frozen=True)
+class ChannelConfig:
+    # Shared by the settings copies of all threads, so it's immutable.
+    # A plain dataclass, it's validated as a part of Settings only.
+    alias: str = ""
+    svq: str = DEFAULT_STREAM_RECORD_QUALITY
+
+    def __post_init__(self):
+        # Unknown qualities fail the settings load, not a record start
+        if self.svq not in AVAILABLE_STREAM_RECORD_QUALITIES:
+            raise ValueError(f"Unknown stream quality {self.svq!r}")
+
+    @cached_property
+    def svq_real(self) -> tuple[str, str]:
+        """ yt-dlp arguments of the quality, the config is immutable """
+        return AVAILABLE_STREAM_RECORD_QUALITIES[self.svq]
+
+
 class Settings(BaseSettings):
 
     records_dir: str = Field(
-        default=str(PROJECT_PATH.joinpath('records')),
+        default=DEFAULT_RECORDS_DIR,
     )
 
     ffmpeg: str = Field(
@@ -108,10 +184,16 @@ class Settings(BaseSettings):
         default=False,
     )
 
-    channels: dict[str, 'ChannelConfig'] = Field(
+    channels: dict[str, ChannelConfig] = Field(
         default={},
     )
 
+    @field_validator('channels')
+    @classmethod
+    def _intern_channel_names(cls, channels: dict) -> dict:
+        # Channel names are the keys of all the services lookups
+        return {sys.intern(name): config for name, config in channels.items()}
+
     cookies_from_browser: str = Field(
         default=EMPTY_ITEM,
     )
@@ -122,27 +204,52 @@ class Settings(BaseSettings):
 
     @classmethod
     def load(cls) -> tuple[bool, 'Settings']:
+        global _settings_file_cache
         suc = True
         try:
-            if SETTINGS_FILE.exists():
-                with open(SETTINGS_FILE, 'r') as conf_file:
-                    settings = json.load(conf_file, cls=SettingsLoader)
-                    return suc, cls(**settings)
-            else:
-                inst = cls()
+            try:
+                # pydantic parses UTF-8 bytes, no text decoding required
+                with open(SETTINGS_FILE, 'rb') as conf_file:
+                    content = conf_file.read()
+                    mtime = os.fstat(conf_file.fileno()).st_mtime
+            except FileNotFoundError:
+                inst = cls.default()
                 inst.save()
                 return suc, inst
+            # Parsed and validated by pydantic in one pass
+            settings = cls.model_validate_json(content)
+            _settings_file_cache = (content, mtime)
+            return suc, settings
         except Exception as e:
             suc = False
             logger.error(e)
-        return suc, cls()
+        return suc, cls.default()
+
+    @classmethod
+    def default(cls) -> 'Settings':
+        """ Settings with default values and environment overrides """
+        # model_construct() would skip the environment variables
+        return cls()
 
     def save(self) -> bool:
+        """ Write settings to the file if they differ from its content """
+        global _settings_file_cache
         suc = True
-        settings = self.model_dump()
+        # Serialized by pydantic, without building an intermediate dict
+        content = self.model_dump_json(indent=4).encode('utf-8')
         try:
-            with open(SETTINGS_FILE, 'w') as conf_file:
-                json.dump(settings, conf_file, indent=4)
+            if (_settings_file_cache is not None
+                    and SETTINGS_FILE.exists()
+                    and _settings_file_cache == (
+                        content, SETTINGS_FILE.stat().st_mtime)):
+                return suc
+            # Replace the file at once, so a crash can't leave it broken
+            with open(SETTINGS_TMP_FILE, 'wb') as conf_file:
+                conf_file.write(content)
+                conf_file.flush()
+                os.fsync(conf_file.fileno())
+            os.replace(SETTINGS_TMP_FILE, SETTINGS_FILE)
+            _settings_file_cache = (content, SETTINGS_FILE.stat().st_mtime)
         except Exception as e:
             suc = False
             logger.error(e)
@@ -150,46 +257,31 @@ class Settings(BaseSettings):
             return suc
 
 
-class ChannelConfig(BaseSettings):
-    alias: str = Field(default="")
-    svq: str = Field(default='Maximum')
-
-    def svq_real(self):
-        return AVAILABLE_STREAM_RECORD_QUALITIES[self.svq]
-
-
 class StopThreads(Exception):
     pass
 
 
-class SoftStoppableThread(QThread):
+class RecordProcess(Popen):
     """
-    Has:
-     1. Variable 'stop' for management
-     2. Function 'raise_on_stop' to raise StopThreads
+    Process with output lines collected by a separate thread.
+    Pipes can't be polled without blocking on Windows.
     """
-    def __init__(self):
-        self.__stop = False
-        super().__init__()
-
-    def run(self) -> None:
-        self.__stop = False
-
-    def soft_stop(self):
-        """
-        Set 'stop' = True
-        """
-        self.__stop = True
-
-    def _raise_on_stop(self):
+    def __init__(self, *args, channel: str, **kwargs) -> None:
+        super().__init__(*args, stdout=PIPE, stderr=STDOUT, **kwargs)
+        self.channel = channel
+        self.output: SimpleQueue[bytes] = SimpleQueue()
+        self._output_reader = Thread(
+            target=self._read_output, name=f'output-{self.pid}', daemon=True)
+        self._output_reader.start()
+
+    def _read_output(self):
+        with self.stdout:
+            for line in self.stdout:
+                self.output.put(line)
+
+    def wait_output_closed(self, timeout: float):
         """
-        Raise StopThreads if 'stop' == True
+        Wait for the rest of the output of the finished process.
+        Its children may still hold the pipe, so the wait is limited.
         """
-        if self.__stop:
-            raise StopThreads
-
-
-class RecordProcess(Popen):
-    def __init__(self, *args, **kwargs) -> None:
-        self.channel: str = kwargs.pop('channel')
-        super().__init__(*args, **kwargs)
+        self._output_reader.join(timeout)
@@ -14,15 +14,29 @@ def common_splitter():
 
 class BaseWidget(QWidget):
     """ Centralize, '_init_ui' """
+    # Build the UI on the first show instead of the construction
+    _lazy_ui = False
 
     def __init__(self, *args, **kwargs):
         super(BaseWidget, self).__init__(*args, **kwargs)
         centralize(self)
-        self._init_ui()
+        self._ui_ready = False
+        if not self._lazy_ui:
+            self._ensure_ui()
 
     def _init_ui(self):
         raise NotImplementedError
 
+    def _ensure_ui(self):
+        if not self._ui_ready:
+            self._ui_ready = True
+            self._init_ui()
+
+    def setVisible(self, visible: bool):
+        if visible:
+            self._ensure_ui()
+        super(BaseWidget, self).setVisible(visible)
+
 
 class ConfirmableWidget(BaseWidget):
     confirm = pyqtSignal()
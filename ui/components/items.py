@@ -1,16 +1,30 @@
-from typing import Union
+from typing import List, Union
 
-from PyQt5.QtGui import QStandardItem
+from PyQt5.QtGui import QBrush, QColor
 
 
-class ChannelItem(QStandardItem):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.channel: str = ''
+class ChannelItem:
+    """ Channel row of ChannelsModel """
+    __slots__ = ('channel', 'text', 'background', 'children', 'row')
+    foreground = None
 
+    def __init__(self, channel: str, text: str, row: int):
+        self.channel = channel
+        self.text = text
+        self.background: Union[QBrush, None] = None
+        self.children: List[RecordProcessItem] = []
+        # Kept up to date by the model, the views ask for it constantly
+        self.row = row
 
-class RecordProcessItem(QStandardItem):
-    def __init__(self, *args, **kwargs):
-        self.pid: Union[int, None] = None
+
+class RecordProcessItem:
+    """ Process row of ChannelsModel, a child of the channel row """
+    __slots__ = ('pid', 'text', 'foreground', 'finished', 'parent')
+    background = None
+
+    def __init__(self, pid: int, text: str, parent: ChannelItem):
+        self.pid = pid
+        self.text = text
+        self.foreground: Union[QColor, None] = None
         self.finished: bool = False
-        super(RecordProcessItem, self).__init__(*args, **kwargs)
\ No newline at end of file
+        self.parent = parent
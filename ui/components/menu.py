@@ -1,4 +1,6 @@
-from PyQt5.QtCore import pyqtSignal, Qt, QUrl, pyqtSlot
+from typing import Union
+
+from PyQt5.QtCore import pyqtSignal, Qt, QTimer, QUrl, pyqtSlot
 from PyQt5.QtGui import QDesktopServices
 from PyQt5.QtWidgets import QVBoxLayout, QLineEdit, QPushButton, QHBoxLayout, \
     QCheckBox, QLabel, QBoxLayout, QSpinBox, QFileDialog, QDialog
@@ -10,9 +12,13 @@ from ui.components.base import ConfirmableWidget, Field, common_splitter, \
 from ui.dynamic_style import STYLE
 from ui.utils import get_supported_browsers
 
+# Pause in typing after which an executable path is checked
+PATH_CHECK_DELAY_MS = 300
+
 
 class AddChannelWidget(ConfirmableWidget):
     checkChannelExists = pyqtSignal(str)
+    _lazy_ui = True
 
     def _init_ui(self):
         self.setWindowTitle("OSSK | Add channel to track")
@@ -43,6 +49,7 @@ class AddChannelWidget(ConfirmableWidget):
         self.setLayout(vbox)
 
     def show(self):
+        self._ensure_ui()
         self.field_channel.clear()
         self.field_channel.setFocus()
         super().show()
@@ -84,7 +91,13 @@ class SettingsWindow(SettingsWidget):
         # Field: Path to ffmpeg
         self.field_ffmpeg_file = QLineEdit()
         self.field_ffmpeg_file.setPlaceholderText("Enter path to ffmpeg")
-        self.field_ffmpeg_file.textChanged[str].connect(self._check_ffmpeg)
+        # ffmpeg is checked by running it, so not on every keystroke
+        self._ffmpeg_check_timer = QTimer(self)
+        self._ffmpeg_check_timer.setSingleShot(True)
+        self._ffmpeg_check_timer.setInterval(PATH_CHECK_DELAY_MS)
+        self._ffmpeg_check_timer.timeout.connect(self._check_ffmpeg)
+        self.field_ffmpeg_file.textChanged.connect(
+            lambda: self._ffmpeg_check_timer.start())
         self.field_ffmpeg_file.setToolTip(
             "Checks:\n"
             "1. Is the specified path available as a file.\n"
@@ -218,7 +231,7 @@ class SettingsWindow(SettingsWidget):
 
     @pyqtSlot(int)
     def _check_max_downloads(self, value: int):
-        status = STYLE.SPIN_WARNING if value not in range(1, 13) \
+        status = STYLE.SPIN_WARNING if not 1 <= value <= 12 \
             else STYLE.SPIN_VALID
         self.box_max_downloads.setStyleSheet(status)
 
@@ -228,8 +241,9 @@ class SettingsWindow(SettingsWidget):
         status = STYLE.LINE_INVALID if not suc else STYLE.LINE_VALID
         self.field_records_dir.setStyleSheet(status)
 
-    @pyqtSlot(str)
-    def _check_ffmpeg(self, ffmpeg_path: str):
+    @pyqtSlot()
+    def _check_ffmpeg(self):
+        ffmpeg_path = self.field_ffmpeg_file.text()
         suc = check_exists_and_callable(ffmpeg_path)
         status = STYLE.LINE_INVALID if not suc else STYLE.LINE_VALID
         self.field_ffmpeg_file.setStyleSheet(status)
@@ -257,6 +271,9 @@ class SettingsWindow(SettingsWidget):
 
 
 class BypassWidget(SettingsWidget):
+    # The browsers list parses the fake user agents data
+    _lazy_ui = True
+    _settings: Union['Settings', None] = None
 
     def _init_ui(self):
         self.setWindowTitle("OSSK | Bypass settings")
@@ -284,12 +301,31 @@ class BypassWidget(SettingsWidget):
         vbox.addWidget(button_apply)
         self.setLayout(vbox)
 
+        if self._settings is not None:
+            self._show_values()
+
     def _update_fake_useragent_status(self):
         self.field_fake_useragent.widget.setEnabled(
             self.field_cookies_from_browser.widget.currentText() != EMPTY_ITEM
         )
 
     def update_values(self, settings: 'Settings'):
+        """ Fields are filled now or when the window is opened """
+        self._settings = settings
+        if self._ui_ready:
+            self._show_values()
+
+    def apply_values(self, settings: 'Settings'):
+        """ Write the fields values to the settings if they are shown """
+        if not self._ui_ready:
+            return
+        settings.fake_useragent = \
+            self.field_fake_useragent.widget.isChecked()
+        settings.cookies_from_browser = (
+            self.field_cookies_from_browser.widget.currentText().lower())
+
+    def _show_values(self):
+        settings = self._settings
         self.field_fake_useragent.widget.setChecked(settings.fake_useragent)
 
         cookie_item = self.field_cookies_from_browser.widget.findText(
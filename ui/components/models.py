@@ -0,0 +1,204 @@
+import sys
+from collections import deque
+from typing import Union
+
+from PyQt5.QtCore import (QAbstractItemModel, QAbstractListModel,
+                          QModelIndex, Qt)
+from PyQt5.QtGui import QBrush, QColor
+
+from ui.components.items import ChannelItem, RecordProcessItem
+
+
+class LogModel(QAbstractListModel):
+    """
+    The last 'limit' log lines with their colors.
+    Rows are plain tuples, no item objects are created per line.
+    """
+    def __init__(self, limit: int):
+        super(LogModel, self).__init__()
+        self._limit = limit
+        self._rows: deque[tuple[str, Union[QColor, None]]] = deque()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            return self._rows[index.row()][0]
+        if role == Qt.ForegroundRole:
+            return self._rows[index.row()][1]
+        return None
+
+    def add_rows(self, rows: list[tuple[str, Union[QColor, None]]]):
+        """
+        Append rows, the oldest ones over the limit are removed
+
+        :param rows: Pairs of line text and color
+        """
+        rows = rows[-self._limit:]
+        if not rows:
+            return
+        excess = len(self._rows) + len(rows) - self._limit
+        if excess > 0:
+            self.beginRemoveRows(QModelIndex(), 0, excess - 1)
+            for _ in range(excess):
+                self._rows.popleft()
+            self.endRemoveRows()
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+
+class ChannelsModel(QAbstractItemModel):
+    """
+    Channels with their record processes as children.
+    Rows are plain Python objects, found by channel name or pid.
+    """
+    def __init__(self):
+        super(ChannelsModel, self).__init__()
+        self._channel_items: list[ChannelItem] = []
+        self._map_channel_item: dict[str, ChannelItem] = {}
+        self._map_pid_item: dict[int, RecordProcessItem] = {}
+
+    # Model interface
+    def index(self, row: int, column: int,
+              parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if parent.isValid():
+            return self.createIndex(
+                row, column, parent.internalPointer().children[row])
+        return self.createIndex(row, column, self._channel_items[row])
+
+    def parent(self, index: QModelIndex) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        item = index.internalPointer()
+        if isinstance(item, ChannelItem):
+            return QModelIndex()
+        return self._channel_index(item.parent)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if not parent.isValid():
+            return len(self._channel_items)
+        item = parent.internalPointer()
+        return len(item.children) if isinstance(item, ChannelItem) else 0
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 1
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            return index.internalPointer().text
+        if role == Qt.BackgroundRole:
+            return index.internalPointer().background
+        if role == Qt.ForegroundRole:
+            return index.internalPointer().foreground
+        return None
+
+    # Items access
+    def item(self, index: Union[QModelIndex, None]
+             ) -> Union[ChannelItem, RecordProcessItem, None]:
+        if index is None or not index.isValid():
+            return None
+        return index.internalPointer()
+
+    def _channel_index(self, item: ChannelItem) -> QModelIndex:
+        return self.createIndex(item.row, 0, item)
+
+    def _process_index(self, item: RecordProcessItem) -> QModelIndex:
+        return self.createIndex(item.parent.children.index(item), 0, item)
+
+    # Channels
+    def add_channels(self, channels: list[tuple[str, str]]):
+        """
+        Append channels with a single rows insertion
+
+        :param channels: Pairs of channel name and row text
+        """
+        if not channels:
+            return
+        first = len(self._channel_items)
+        self.beginInsertRows(QModelIndex(), first, first + len(channels) - 1)
+        for channel_name, text in channels:
+            # Names from the settings are interned already, it's a no-op
+            channel_name = sys.intern(channel_name)
+            item = ChannelItem(
+                channel_name, text, len(self._channel_items))
+            self._map_channel_item[channel_name] = item
+            self._channel_items.append(item)
+        self.endInsertRows()
+
+    def del_channel(self, channel_name: str) -> list[int]:
+        """
+        Remove the channel row with its process rows
+
+        :return: Process IDs of the removed process rows
+        """
+        item = self._map_channel_item.pop(channel_name, None)
+        if item is None:
+            return []
+        row = item.row
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._channel_items[row]
+        for next_row in range(row, len(self._channel_items)):
+            self._channel_items[next_row].row = next_row
+        self.endRemoveRows()
+        pids = [process_item.pid for process_item in item.children]
+        for pid in pids:
+            del self._map_pid_item[pid]
+        return pids
+
+    def set_channel_text(self, channel_name: str, text: str):
+        item = self._map_channel_item.get(channel_name)
+        if item is not None:
+            item.text = text
+            self._item_changed(self._channel_index(item))
+
+    def set_channel_background(self, channel_name: str, brush: QBrush):
+        # The channel may be deleted while its status signal was queued
+        item = self._map_channel_item.get(channel_name)
+        if item is not None and item.background is not brush:
+            item.background = brush
+            self._item_changed(self._channel_index(item))
+
+    # Processes
+    def add_process(self, channel_name: str, pid: int,
+                    text: str) -> QModelIndex:
+        """
+        Append the process row to the channel row
+
+        :return: Index of the channel row
+        """
+        channel_item = self._map_channel_item[channel_name]
+        parent = self._channel_index(channel_item)
+        row = len(channel_item.children)
+        self.beginInsertRows(parent, row, row)
+        item = RecordProcessItem(pid, text, channel_item)
+        self._map_pid_item[pid] = item
+        channel_item.children.append(item)
+        self.endInsertRows()
+        return parent
+
+    def del_process(self, pid: int):
+        # The channel may be deleted while the process signal was queued
+        item = self._map_pid_item.pop(pid, None)
+        if item is None:
+            return
+        channel_item = item.parent
+        row = channel_item.children.index(item)
+        self.beginRemoveRows(self._channel_index(channel_item), row, row)
+        del channel_item.children[row]
+        self.endRemoveRows()
+
+    def set_process_finished(self, pid: int, foreground: QColor):
+        item = self._map_pid_item.get(pid)
+        if item is None:
+            return
+        item.finished = True
+        item.foreground = foreground
+        self._item_changed(self._process_index(item))
+
+    def _item_changed(self, index: QModelIndex):
+        self.dataChanged.emit(index, index)
@@ -3,7 +3,7 @@ from typing import List
 from PyQt5.QtWidgets import QApplication
 from yt_dlp import SUPPORTED_BROWSERS as YTDLP_BROWSERS
 
-from static_vars import FAKE_AGENTS
+from static_vars import get_fake_agents
 
 
 def centralize(widget):
@@ -14,8 +14,9 @@ def centralize(widget):
 
 def get_supported_browsers() -> List[str]:
     supported_browsers = []
+    fake_browsers = get_fake_agents().browsers
     for supported_browser in YTDLP_BROWSERS:
-        for fake_browser in FAKE_AGENTS.browsers:
+        for fake_browser in fake_browsers:
             if fake_browser.lower() == supported_browser.lower():
                 supported_browsers.append(supported_browser.capitalize())
     return sorted(supported_browsers)
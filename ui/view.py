@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime
+from time import localtime, monotonic, strftime, time
 from typing import Union
 
-from PyQt5.QtCore import pyqtSignal, pyqtSlot, QModelIndex, Qt, QUrl
-from PyQt5.QtGui import (QColor, QLinearGradient, QMouseEvent,
-                         QStandardItem, QStandardItemModel, QDesktopServices)
+from PyQt5.QtCore import (pyqtSignal, pyqtSlot, QAbstractItemModel,
+                          QModelIndex, Qt, QTimer, QUrl)
+from PyQt5.QtGui import (QBrush, QColor, QLinearGradient, QMouseEvent,
+                         QDesktopServices)
 from PyQt5.QtWidgets import (
     QAbstractItemView, QAction, QHBoxLayout,
     QLabel, QLineEdit, QListView, QMenu, QPushButton, QTabWidget,
@@ -14,43 +15,58 @@ from PyQt5.QtWidgets import (
 
 from main_utils import get_channel_dir
 from static_vars import (
-    logging_handler, AVAILABLE_STREAM_RECORD_QUALITIES, RecordProcess,
+    logging_handler, AVAILABLE_STREAM_RECORD_QUALITIES_KEYS, RecordProcess,
     STYLESHEET_PATH, Settings, CHANNEL_URL_TEMPLATE)
 from ui.components.base import ConfirmableWidget, Field, ComboBox
 from ui.components.items import ChannelItem, RecordProcessItem
 from ui.components.menu import AddChannelWidget, BypassWidget, SettingsWindow
+from ui.components.models import ChannelsModel, LogModel
 from ui.utils import centralize
 
 logger = logging.getLogger()
 logger.setLevel(logging.DEBUG)
 logger.addHandler(logging_handler)
 
+# Interval of printing collected process output to the log tabs
+PROC_LOG_FLUSH_INTERVAL_MS = 100
+# Dark part of the channel status gradients
+_GRADIENT_BASE = QColor(25, 25, 25)
+
+
+def _smooth_gradient(qcolor: QColor) -> QLinearGradient:
+    gradient = QLinearGradient(0, 0, 300, 0)
+    gradient.setColorAt(0.0, _GRADIENT_BASE)
+    gradient.setColorAt(0.6, _GRADIENT_BASE)
+    gradient.setColorAt(1.0, qcolor)
+    return gradient
+
 
 class Status:
 
     class Channel:
         OFF = 0
         LIVE = 1
-        _color_map = {OFF: QColor(50, 50, 50),
-                      LIVE: QColor(0, 180, 0)}
+        # Brushes are built once, at import
+        _brush_map = {OFF: QBrush(_smooth_gradient(QColor(50, 50, 50))),
+                      LIVE: QBrush(_smooth_gradient(QColor(0, 180, 0)))}
 
         @staticmethod
-        def gradient(status_id: int) -> QLinearGradient:
-            color = Status.Channel._color_map[status_id]
-            return Status._smooth_gradient(color)
+        def background(status_id: int) -> QBrush:
+            return Status.Channel._brush_map[status_id]
 
     class Stream:
         OFF = 0
         REC = 1
         FAIL = 2
 
-        _color_map = {OFF: QColor(50, 50, 50),
-                      REC: QColor(0, 180, 0),
-                      FAIL: QColor(180, 0, 0)}
+        # Indexed by the status id
+        _colors = (QColor(50, 50, 50),
+                   QColor(0, 180, 0),
+                   QColor(180, 0, 0))
 
         @staticmethod
         def foreground(status_id: int) -> QColor:
-            return Status.Stream._color_map[status_id]
+            return Status.Stream._colors[status_id]
 
     class Message:
         DEBUG = 10
@@ -67,14 +83,6 @@ class Status:
         def foreground(level: int) -> QColor:
             return Status.Message._color_map[level]
 
-    @staticmethod
-    def _smooth_gradient(qcolor: QColor):
-        gradient = QLinearGradient(0, 0, 300, 0)
-        gradient.setColorAt(0.0, QColor(25, 25, 25))
-        gradient.setColorAt(0.6, QColor(25, 25, 25))
-        gradient.setColorAt(1.0, qcolor)
-        return gradient
-
 
 class MainWindow(QMainWindow):
     saveSettings = pyqtSignal(Settings)
@@ -142,6 +150,11 @@ class MainWindow(QMainWindow):
         self.bypass_settings.setStyleSheet(style)
 
         self.status_bar = self.statusBar()
+        # Countdown to the next scan, Master sends its start only
+        self._scan_deadline = 0.0
+        self._scan_countdown = QTimer(self)
+        self._scan_countdown.setInterval(1000)
+        self._scan_countdown.timeout.connect(self._show_scan_countdown)
 
         self.widget_channels_tree = ChannelsTree()
         self.widget_channels_tree.action_stop.triggered.connect(
@@ -149,12 +162,12 @@ class MainWindow(QMainWindow):
         self.widget_channels_tree.action_channel_settings.triggered.connect(
             self._send_open_channel_settings)
         self.widget_channels_tree.action_open_channel_dir.triggered.connect(
-            lambda: QDesktopServices.openUrl(QUrl.fromLocalFile(str(
+            lambda: QDesktopServices.openUrl(QUrl.fromLocalFile(
                 get_channel_dir(
                     self.widget_channels_tree.selected_channel_name(),
                     self.settings.records_dir,
                 )
-            )))
+            ))
         )
         self.widget_channels_tree.action_delete_channel.triggered.connect(
             self._send_del_channel)
@@ -209,11 +222,9 @@ class MainWindow(QMainWindow):
         self.set_common_settings_values()
 
     def _set_channels(self, settings: Settings):
-        for channel_name, channel_data in settings.channels.items():
-            self.widget_channels_tree.add_channel_item(
-                channel_name,
-                channel_data.alias,
-            )
+        self.widget_channels_tree.add_channel_items([
+            (channel_name, channel_data.alias)
+            for channel_name, channel_data in settings.channels.items()])
 
     def get_common_settings_values(self) -> Settings:
         self.settings.records_dir = \
@@ -230,12 +241,7 @@ class MainWindow(QMainWindow):
             self.settings_window.box_proc_term_timeout.value()
         self.settings.hide_suc_fin_proc = \
             self.settings_window.box_hide_suc_fin_proc.isChecked()
-        self.settings.fake_useragent = \
-            self.bypass_settings.field_fake_useragent.widget.isChecked()
-        self.settings.cookies_from_browser = (
-            self.bypass_settings.field_cookies_from_browser.widget
-            .currentText().lower()
-        )
+        self.bypass_settings.apply_values(self.settings)
         return self.settings
 
     def set_common_settings_values(self):
@@ -307,11 +313,23 @@ class MainWindow(QMainWindow):
     @pyqtSlot(int)
     def update_scan_timer(self, seconds: int):
         """ [IN] """
+        self._scan_deadline = monotonic() + seconds
+        self._show_scan_countdown()
+        if seconds > 0:
+            self._scan_countdown.start()
+
+    @pyqtSlot()
+    def _show_scan_countdown(self):
+        seconds = max(0, round(self._scan_deadline - monotonic()))
+        if seconds == 0:
+            self._scan_countdown.stop()
         self.status_bar.showMessage(f"Next scan in: {seconds} seconds", 3000)
 
     @pyqtSlot(bool)
     def update_master_enabled(self, enabled: bool):
         self._master_works = enabled
+        if not enabled:
+            self._scan_countdown.stop()
         self._update_manage_buttons_status()
 
     @pyqtSlot(bool)
@@ -322,9 +340,9 @@ class MainWindow(QMainWindow):
 
 class ListView(QListView):
 
-    def __init__(self):
+    def __init__(self, model: QAbstractItemModel):
         super().__init__()
-        self._model = QStandardItemModel()
+        self._model = model
         self.setModel(self._model)
         self.setWordWrap(True)
         self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
@@ -348,14 +366,13 @@ class ChannelsTree(QTreeView):
         self.setMinimumWidth(250)
         self.setMinimumHeight(135)
 
-        self._model = QStandardItemModel()
+        self._model = ChannelsModel()
         self.setModel(self._model)
-        self._root = self._model.invisibleRootItem()
         self.setHeaderHidden(True)
         self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
-
-        self._map_channel_item: dict[str, ChannelItem] = {}
-        self._map_pid_item: dict[int, RecordProcessItem] = {}
+        # All the rows are single lines, they are not measured one by one
+        self.setUniformRowHeights(True)
+        self.setAnimated(False)
 
         # Channel actions
         self.action_channel_settings = QAction("Channel settings", self)
@@ -372,6 +389,19 @@ class ChannelsTree(QTreeView):
         self._action_hide_process.triggered[bool].connect(
             self._del_finished_process_item)
 
+        # Context menus are built once and shown again
+        self._channel_menu = QMenu(self)
+        self._channel_menu.addAction(self.action_channel_settings)
+        self._channel_menu.addAction(self.action_open_channel_dir)
+        self._channel_menu.addSeparator()
+        self._channel_menu.addAction(self.action_delete_channel)
+
+        self._process_menu = QMenu(self)
+        self._process_menu.addAction(self._action_open_tab)
+        self._process_menu.addSeparator()
+        self._process_menu.addAction(self.action_stop)
+        self._process_menu.addAction(self._action_hide_process)
+
     def mousePressEvent(self, e: QMouseEvent):
         self.clearSelection()
         self.selected_item_index = None
@@ -381,7 +411,7 @@ class ChannelsTree(QTreeView):
         selected_indexes = self.selectedIndexes()
         if len(selected_indexes) == 1:
             self.selected_item_index = selected_indexes[0]
-            selected_item = self._model.itemFromIndex(self.selected_item_index)
+            selected_item = self._model.item(self.selected_item_index)
             if isinstance(selected_item, ChannelItem):
                 self._single_channel_menu().exec(event.globalPos())
             elif isinstance(selected_item, RecordProcessItem):
@@ -391,49 +421,52 @@ class ChannelsTree(QTreeView):
 
     # Channel management
     def add_channel_item(self, channel_name: str, alias: str):
-        text = alias if alias else channel_name
-        item = ChannelItem(text)
-        item.channel = channel_name
-        item.setEditable(False)
-        self._map_channel_item[channel_name] = item
-        self._model.appendRow(item)
-
-    def del_channel_item(self):
-        selected_channel_item = self._selected_item()
-        del self._map_channel_item[selected_channel_item.channel]
-        self._model.removeRow(selected_channel_item.row())
-
-    def set_channel_alias(self, alias: str):
-        self._model.itemFromIndex(self.selected_item_index).setText(alias)
-
-    def set_channel_status(self, ch_index: int, status_id: int):
+        self.add_channel_items([(channel_name, alias)])
+
+    def add_channel_items(self, channels: list[tuple[str, str]]):
+        """
+        Add channels with a single rows insertion
+
+        :param channels: Pairs of channel name and alias
+        """
+        self._model.add_channels([
+            (channel_name, alias if alias else channel_name)
+            for channel_name, alias in channels])
+
+    def del_channel_item(self, channel_name: str):
+        # Processes of the channel are finished, forget them with the row
+        for pid in self._model.del_channel(channel_name):
+            self.closeTabByPid[int].emit(pid)
+
+    def set_channel_alias(self, channel_name: str, alias: str):
+        self._model.set_channel_text(channel_name, alias)
+
+    def set_channel_status_by_name(self, channel_name: str, status_id: int):
         """ Sets channel's row color """
         # TODO: make it with a dynamic_style or any other way
-        color = Status.Channel.gradient(status_id)
-        self._model.item(ch_index).setBackground(color)
+        self._model.set_channel_background(
+            channel_name, Status.Channel.background(status_id))
+
+    @pyqtSlot(str)
+    def set_channel_off(self, channel_name: str):
+        self.set_channel_status_by_name(channel_name, Status.Channel.OFF)
+
+    @pyqtSlot(str)
+    def set_channel_live(self, channel_name: str):
+        self.set_channel_status_by_name(channel_name, Status.Channel.LIVE)
 
     # Context menus
     def _single_channel_menu(self) -> QMenu:
-        menu = QMenu(self)
-        menu.addAction(self.action_channel_settings)
-        menu.addAction(self.action_open_channel_dir)
-        menu.addSeparator()
-        menu.addAction(self.action_delete_channel)
-        return menu
+        return self._channel_menu
 
     def _single_process_menu(self, process_finished: bool) -> QMenu:
-        menu = QMenu(self)
-        menu.addAction(self._action_open_tab)
-        menu.addSeparator()
-        if not process_finished:
-            menu.addAction(self.action_stop)
-        else:
-            menu.addAction(self._action_hide_process)
-        return menu
+        self.action_stop.setVisible(not process_finished)
+        self._action_hide_process.setVisible(process_finished)
+        return self._process_menu
 
     # Selected item functions
     def _selected_item(self) -> Union[ChannelItem, RecordProcessItem]:
-        return self._model.itemFromIndex(self.selected_item_index)
+        return self._model.item(self.selected_item_index)
 
     def selected_channel_name(self) -> str:
         """
@@ -449,7 +482,7 @@ class ChannelsTree(QTreeView):
 
     def _send_open_tab_by_pid(self):
         process_item = self._selected_item()
-        stream_name = process_item.text()
+        stream_name = process_item.text
         self.openTabByPid[int, str].emit(process_item.pid, stream_name)
 
     # Process management
@@ -459,13 +492,7 @@ class ChannelsTree(QTreeView):
             pid: int,
             stream_name: str
     ):
-        channel_item = self._map_channel_item[channel_name]
-        process_item = RecordProcessItem(stream_name)
-        process_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-        process_item.pid = pid
-        self._map_pid_item[pid] = process_item
-        channel_item.appendRow(process_item)
-        self.expand(self._model.indexFromItem(channel_item))
+        self.expand(self._model.add_process(channel_name, pid, stream_name))
 
     @pyqtSlot()
     def _del_finished_process_item(self):
@@ -473,27 +500,20 @@ class ChannelsTree(QTreeView):
         if not process_item.finished:
             logger.error("Process cannot be hidden: process not finished yet")
             return
-        channel_item = process_item.parent()
-        channel_item.removeRow(process_item.row())
-        del self._map_pid_item[process_item.pid]
+        self._model.del_process(process_item.pid)
         self.closeTabByPid[int].emit(process_item.pid)
 
     def stream_finished(self, pid: int):
-        process_item = self._map_pid_item[pid]
-
         if self.hide_suc_fin_proc:
-            channel_item = process_item.parent()
-            channel_item.removeRow(process_item.row())
-            del self._map_pid_item[process_item.pid]
+            self._model.del_process(pid)
+            self.closeTabByPid[int].emit(pid)
         else:
-            process_item.finished = True
             color = Status.Stream.foreground(Status.Stream.OFF)
-            process_item.setForeground(color)
+            self._model.set_process_finished(pid, color)
 
     def stream_failed(self, pid: int):
-        self._map_pid_item[pid].finished = True
         color = Status.Stream.foreground(Status.Stream.FAIL)
-        self._map_pid_item[pid].setForeground(color)
+        self._model.set_process_finished(pid, color)
 
 
 class LogTabWidget(QTabWidget):
@@ -502,6 +522,13 @@ class LogTabWidget(QTabWidget):
         self._init_ui()
         self._map_pid_logwidget: dict[int, LogWidget] = {}
 
+        # Process output is printed to the tabs in batches
+        self._pending_proc_logs: dict[int, list[str]] = {}
+        self._proc_log_timer = QTimer(self)
+        self._proc_log_timer.setSingleShot(True)
+        self._proc_log_timer.setInterval(PROC_LOG_FLUSH_INTERVAL_MS)
+        self._proc_log_timer.timeout.connect(self._flush_proc_logs)
+
     def _init_ui(self):
         self.setMovable(True)
 
@@ -521,6 +548,14 @@ class LogTabWidget(QTabWidget):
         """
         self._common_tab.add_message(text, level)
 
+    def add_common_messages(self, messages: list[tuple[str, int]]):
+        """
+        Print a batch of messages to tab "Common"
+
+        :param messages: Pairs of message text and level
+        """
+        self._common_tab.add_messages(messages)
+
     def open_tab_by_pid(self, pid: int, stream_title: str):
         tab_index = self.addTab(self._map_pid_logwidget[pid], stream_title)
         self.setCurrentIndex(tab_index)
@@ -542,18 +577,36 @@ class LogTabWidget(QTabWidget):
 
         :param pid: Process ID
         """
-        tab_index = self.indexOf(self._map_pid_logwidget[pid])
-        self._close_tab(tab_index)
+        # The widget is deleted with the channel while the signal is queued
+        log_widget = self._map_pid_logwidget.get(pid)
+        if log_widget is None:
+            return
+        self._close_tab(self.indexOf(log_widget))
 
     @pyqtSlot(int, str)
     def proc_log(self, pid: int, message: str):
         """
-        Print process message
+        Print process messages
 
         :param pid: Process ID
-        :param message: Process message
+        :param message: Process messages, one per line
         """
-        self._map_pid_logwidget[pid].add_message(message)
+        self._pending_proc_logs.setdefault(pid, []).append(message)
+        if not self._proc_log_timer.isActive():
+            self._proc_log_timer.start()
+
+    @pyqtSlot()
+    def _flush_proc_logs(self):
+        pending = self._pending_proc_logs
+        self._pending_proc_logs = {}
+        for pid, messages in pending.items():
+            # The process may be hidden while its output was pending
+            log_widget = self._map_pid_logwidget.get(pid)
+            if log_widget is None:
+                continue
+            log_widget.add_messages([
+                (line, None)
+                for message in messages for line in message.splitlines()])
 
     def stream_rec(self, pid: int):
         """
@@ -570,7 +623,7 @@ class LogTabWidget(QTabWidget):
         :param pid: Process ID
         """
         self._close_tab_by_pid(pid)
-        del self._map_pid_logwidget[pid]
+        self._map_pid_logwidget.pop(pid, None)
 
     def stream_finished(self, pid: int):
         """
@@ -592,32 +645,47 @@ class LogTabWidget(QTabWidget):
 class LogWidget(ListView):
     _items_limit = 500
 
-    @property
-    def time(self):
-        now = datetime.now()
-        return now.strftime("%H:%M:%S")
+    def _time(self) -> str:
+        """ Current time string, formatted once per second """
+        sec = int(time())
+        if sec != self._last_sec:
+            self._last_sec = sec
+            self._last_time = strftime("%H:%M:%S", localtime(sec))
+        return self._last_time
 
     def __init__(self, process: Union[RecordProcess, None] = None):
-        super().__init__()
+        super().__init__(LogModel(self._items_limit))
+        self._last_sec = -1
+        self._last_time = ''
         self.setMinimumWidth(460)
         self.setMinimumHeight(200)
+        # Lines are not wrapped, so rows are not measured one by one
+        self.setWordWrap(False)
+        self.setUniformItemSizes(True)
         self.process = process
 
     def add_message(self, text: str, level: Union[int, None] = None):
-        message = f"{self.time} {text}"
-        item = QStandardItem(message)
-        item.setEditable(False)
-        if level is not None:
-            item.setForeground(Status.Message.foreground(level))
+        self.add_messages([(text, level)])
 
-        self._model.appendRow(item)
-        if self._model.rowCount() > self._items_limit:
-            self._model.removeRow(0)
+    def add_messages(self, messages: list[tuple[str, Union[int, None]]]):
+        """
+        Add messages with a single repaint
+
+        :param messages: Pairs of message text and level
+        """
+        if not messages:
+            return
+        now = self._time()
+        self._model.add_rows([
+            (f"{now} {text}",
+             None if level is None else Status.Message.foreground(level))
+            for text, level in messages])
 
         self.scrollToBottom()
 
 
 class ChannelSettingsWindow(ConfirmableWidget):
+    _lazy_ui = True
 
     def __init__(self):
         super().__init__()
@@ -639,7 +707,7 @@ class ChannelSettingsWindow(ConfirmableWidget):
         self.field_alias = Field("Channel alias", line_alias)
 
         box_svq = ComboBox()
-        box_svq.addItems(list(AVAILABLE_STREAM_RECORD_QUALITIES.keys()))
+        box_svq.addItems(AVAILABLE_STREAM_RECORD_QUALITIES_KEYS)
         self.field_svq = Field("Stream video quality", box_svq)
 
         button_apply = QPushButton("Apply", self)
@@ -661,6 +729,7 @@ class ChannelSettingsWindow(ConfirmableWidget):
         Triggering by ChannelsTree.action_channel_settings
         through the controller.
         """
+        self._ensure_ui()
         self._channel_name = channel_name
         label_url = CHANNEL_URL_TEMPLATE.format(channel_name)
         self.label_name.setText(